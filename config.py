@@ -4,3 +4,23 @@
 AWS_REGION = 'us-east-1'
 TABLE_NAME = 'UserProfiles'
 GSI_NAME = 'email-index'
+
+# GSI projection (set when the index is created)
+# - Keys are always projected; INCLUDE adds only what query_by_email reads
+# - Narrower than ALL, so every table write copies less data into the index
+# - Queries on the GSI can't return attributes that aren't listed here
+GSI_PROJECTION = {
+    'ProjectionType': 'INCLUDE',
+    'NonKeyAttributes': ['firstName', 'lastName']
+}
+
+# Batch Configuration
+# Roughly provisioned WCU / 50 in-flight BatchWriteItem requests
+BATCH_WRITE_CONCURRENCY = 4
+# Retries for UnprocessedItems / UnprocessedKeys before giving up
+BATCH_MAX_RETRIES = 5
+
+# Read Cache Configuration (seconds)
+ITEM_CACHE_SIZE = 10_000
+ITEM_CACHE_TTL = 30
+EMAIL_CACHE_TTL = 5
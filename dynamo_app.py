@@ -3,54 +3,376 @@ DynamoDB Best Practices Demo
 Demonstrates proper patterns for interacting with DynamoDB
 """
 
-import boto3
-from boto3.dynamodb.conditions import Key, Attr
+import asyncio
+import contextlib
+import copy
+import logging
+import random
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import aioboto3
+from aiobotocore.config import AioConfig
+from boto3.dynamodb.types import TypeDeserializer
 from botocore.exceptions import ClientError
+from cachetools import TTLCache
 from decimal import Decimal
 import time
-import json
-from config import AWS_REGION, TABLE_NAME, GSI_NAME
+import orjson
+from config import (
+    AWS_REGION, TABLE_NAME, GSI_NAME, GSI_PROJECTION,
+    BATCH_WRITE_CONCURRENCY, BATCH_MAX_RETRIES,
+    ITEM_CACHE_SIZE, ITEM_CACHE_TTL, EMAIL_CACHE_TTL
+)
+
+# BEST PRACTICE: Log through logging, not print
+# - Success messages are DEBUG and %s arguments are only formatted if emitted
+# - Applications opt in to output; the library stays silent by default
+log = logging.getLogger(__name__)
+log.addHandler(logging.NullHandler())
+
+# BEST PRACTICE: Tune the client instead of relying on defaults
+# - Pool sized for concurrent requests (default is 10)
+# - Adaptive retries back off client-side when DynamoDB throttles
+# - Tight timeouts keep a stuck connection from stalling the caller
+# - Keep-alive and DNS caching need no settings: aiobotocore already reuses
+#   idle pooled connections (keepalive_timeout=12) and aiohttp caches DNS
+_CFG = AioConfig(
+    max_pool_connections=50,
+    retries={'max_attempts': 3, 'mode': 'adaptive'},
+    connect_timeout=5,
+    read_timeout=10
+)
+
+# BEST PRACTICE: Pre-built key condition strings, picked by which sort key
+# bounds are given - skips building Key() condition objects on every call
+_ACTIVITY_KEY_CONDITIONS = {
+    (False, False): 'userId = :uid',
+    (True, True): 'userId = :uid AND #ts BETWEEN :start AND :end',
+    (True, False): 'userId = :uid AND #ts >= :start',
+    (False, True): 'userId = :uid AND #ts <= :end',
+}
+
+# BEST PRACTICE: Pre-built update_preferences expressions, keyed by a bitmask
+# of which fields are given (bit 0: theme, bit 1: notifications)
+_PREFERENCE_UPDATES = {
+    0b01: (
+        'SET #prefs.#theme = :theme',
+        {'#prefs': 'preferences', '#theme': 'theme'}
+    ),
+    0b10: (
+        'SET #prefs.#notif = :notif',
+        {'#prefs': 'preferences', '#notif': 'notifications'}
+    ),
+    0b11: (
+        'SET #prefs.#theme = :theme, #prefs.#notif = :notif',
+        {'#prefs': 'preferences', '#theme': 'theme', '#notif': 'notifications'}
+    ),
+}
+
+# BEST PRACTICE: Build fixed expression pieces once at import time
+# - Passed as-is on every call; only per-call values are built in the methods
+# - Safe to share: the resource layer copies request params before it
+#   modifies them
+_TS_NAMES = {'#ts': 'timestamp'}
+_PUT_CONDITION = 'attribute_not_exists(userId) AND attribute_not_exists(#ts)'
+_UPSERT_EXPR = (
+    'SET email = if_not_exists(email, :email), '
+    'firstName = if_not_exists(firstName, :first), '
+    'lastName = if_not_exists(lastName, :last)'
+)
+_UPDATE_LOGIN_EXPR = 'ADD loginCount :inc'
+_PROJ_PROFILE = 'userId, email, firstName, lastName, loginCount'
+_PROJ_BATCH_PROFILE = 'userId, #ts, email, firstName, lastName, loginCount'
+_PROJ_ACTIVITY = 'userId, #ts, loginCount'
+# Only request what the GSI projects (table keys + email + INCLUDE attributes)
+_EMAIL_PROJECTION = ', '.join(
+    ['userId', '#ts', 'email'] + GSI_PROJECTION['NonKeyAttributes']
+)
+
+
+def _floats_to_decimal(value):
+    """DynamoDB rejects Python floats; convert them to Decimal recursively"""
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {k: _floats_to_decimal(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_floats_to_decimal(v) for v in value]
+    return value
+
+
+def _low_level_key(user_id, timestamp):
+    """Hand-marshal the table's string primary key for low-level client calls"""
+    return {'userId': {'S': user_id}, 'timestamp': {'S': timestamp}}
+
+
+def _forbid_scan(*args, **kwargs):
+    """
+    BEST PRACTICE: Don't Scan - it reads (and bills for) the whole table
+    - Use query on the table or on a GSI instead
+    - Plain function so the call fails immediately, awaited or not
+    """
+    raise RuntimeError("Scan is disabled; use query on the table or a GSI")
+
+
+async def _backoff(attempt):
+    """Sleep with full-jitter exponential backoff before a batch retry"""
+    await asyncio.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+
+
+def _retrieve_exception(task):
+    """Mark a shared fetch's exception as seen, even if every caller was cancelled"""
+    if not task.cancelled():
+        task.exception()
+
+
+class _CoalescingCache:
+    """
+    BEST PRACTICE: Serve repeat reads of hot keys from a short-lived cache
+    - Concurrent misses for the same key share a single in-flight request
+    - Callers get their own copy, so mutating a result can't leak into the cache
+    - None (item not found) is never cached, so a later create is seen at once
+    """
+    
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight = {}
+    
+    async def get(self, key, fetch):
+        """Return the cached value for key, calling fetch() at most once on a miss"""
+        if key in self._cache:
+            return copy.deepcopy(self._cache[key])
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fill(key, fetch))
+            task.add_done_callback(_retrieve_exception)
+            self._inflight[key] = task
+        # Shielded so one cancelled caller doesn't cancel the others' request
+        return copy.deepcopy(await asyncio.shield(task))
+    
+    async def _fill(self, key, fetch):
+        try:
+            value = await fetch()
+            # Skip caching if the key was invalidated while the read was in flight
+            if value is not None and self._inflight.get(key) is asyncio.current_task():
+                self._cache[key] = value
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+    
+    def invalidate(self, key):
+        """Drop key from the cache and detach any in-flight read for it"""
+        self._cache.pop(key, None)
+        self._inflight.pop(key, None)
+    
+    def clear(self):
+        self._cache.clear()
+        self._inflight.clear()
+
+
+# BEST PRACTICE: One session per process
+# - Credentials and service models are loaded once, not per DynamoDBApp
+_SESSION = aioboto3.Session(region_name=AWS_REGION)
+
+
+class _SharedConnections:
+    """
+    BEST PRACTICE: Share one open resource and client across DynamoDBApp instances
+    - The connection pool stays warm instead of reconnecting per instance
+    - One set per event loop (aiohttp connections can't cross loops),
+      closed when its last user exits
+    - The read caches live here too, so a write through any instance
+      invalidates what every other instance reads
+    """
+    
+    _by_loop = weakref.WeakKeyDictionary()
+    
+    def __init__(self):
+        self._users = 0
+        self._lock = asyncio.Lock()
+        self._stack = None
+        self.dynamodb = None
+        self.table = None
+        self.client = None
+        self.profile_cache = _CoalescingCache(ITEM_CACHE_SIZE, ITEM_CACHE_TTL)
+        self.email_cache = _CoalescingCache(ITEM_CACHE_SIZE, EMAIL_CACHE_TTL)
+    
+    @classmethod
+    async def acquire(cls):
+        """Return the running loop's connections, opening them on first use"""
+        loop = asyncio.get_running_loop()
+        shared = cls._by_loop.get(loop)
+        if shared is None:
+            shared = cls._by_loop[loop] = cls()
+        
+        async with shared._lock:
+            if shared._users == 0:
+                await shared._open()
+            shared._users += 1
+        return shared
+    
+    async def release(self):
+        """Drop one user; the last one closes the clients and their pools"""
+        async with self._lock:
+            self._users -= 1
+            if self._users == 0:
+                await self._stack.aclose()
+                self._stack = None
+                self.dynamodb = None
+                self.table = None
+                self.client = None
+                self.profile_cache.clear()
+                self.email_cache.clear()
+    
+    async def _open(self):
+        async with contextlib.AsyncExitStack() as stack:
+            self.dynamodb = await stack.enter_async_context(
+                _SESSION.resource('dynamodb', config=_CFG)
+            )
+            self.table = await self.dynamodb.Table(TABLE_NAME)
+            self.table.scan = _forbid_scan
+            self.dynamodb.meta.client.scan = _forbid_scan
+            
+            # BEST PRACTICE: Plain low-level client for hand-marshalled calls
+            # - resource.meta.client would serialize the parameters a second time
+            self.client = await stack.enter_async_context(
+                _SESSION.client('dynamodb', config=_CFG)
+            )
+            self.client.scan = _forbid_scan
+            self._stack = stack.pop_all()
 
 
 class DynamoDBApp:
     """Handles DynamoDB operations with best practices"""
     
+    # BEST PRACTICE: Build the deserializer once, not per low-level response
+    _DESERIALIZER = TypeDeserializer()
+    
     def __init__(self):
-        """Initialize DynamoDB resource and table"""
-        self.dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
-        self.table = self.dynamodb.Table(TABLE_NAME)
+        """Connections and read caches are shared; __aenter__ attaches them"""
+        self.dynamodb = None
+        self.table = None
+        self.client = None
+        self._profile_cache = None
+        self._email_cache = None
+    
+    def _deserialize_item(self, raw_item):
+        """Convert a low-level attribute map into plain Python values"""
+        deserialize = self._DESERIALIZER.deserialize
+        return {k: deserialize(v) for k, v in raw_item.items()}
     
-    def load_seed_data(self, filename='seed_data.json'):
+    async def __aenter__(self):
+        """
+        BEST PRACTICE: Keep the resource open and reuse it for every call
+        - Re-entering the context manager per call closes the client
+        """
+        self._shared = await _SharedConnections.acquire()
+        self.dynamodb = self._shared.dynamodb
+        self.table = self._shared.table
+        self.client = self._shared.client
+        self._profile_cache = self._shared.profile_cache
+        self._email_cache = self._shared.email_cache
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        """Release the shared connections; the last user closes them"""
+        await self._shared.release()
+        self.dynamodb = None
+        self.table = None
+        self.client = None
+        self._profile_cache = None
+        self._email_cache = None
+    
+    async def load_seed_data(self, filename='seed_data.json'):
         """
         Load initial data from JSON file
         - Useful for resetting table to known state
-        - Batch writes for efficiency
+        - Batch writes (25 items max per request) sent concurrently
+        - In-flight batches are capped so provisioned WCU isn't overrun
         """
         try:
-            with open(filename, 'r') as f:
-                items = json.load(f)
+            # BEST PRACTICE: orjson parses large seed files several times faster
+            with open(filename, 'rb') as f:
+                items = _floats_to_decimal(orjson.loads(f.read()))
             
-            # Batch write items
-            with self.table.batch_writer() as batch:
-                for item in items:
-                    batch.put_item(Item=item)
+            # BEST PRACTICE: Split into 25-item batches and send them in parallel
+            chunks = [items[i:i + 25] for i in range(0, len(items), 25)]
+            semaphore = asyncio.Semaphore(BATCH_WRITE_CONCURRENCY)
+            await asyncio.gather(*[
+                self._write_batch(chunk, semaphore) for chunk in chunks
+            ])
             
-            print(f"✓ Loaded {len(items)} items from {filename}")
+            self._profile_cache.clear()
+            self._email_cache.clear()
+            log.debug("✓ Loaded %s items from %s", len(items), filename)
             return len(items)
         except FileNotFoundError:
-            print(f"✗ File {filename} not found")
+            log.error("✗ File %s not found", filename)
             raise
         except Exception as e:
-            print(f"✗ Error loading seed data: {str(e)}")
+            log.error("✗ Error loading seed data: %s", e)
             raise
     
-    def put_user_profile(self, user_id, email, first_name, last_name, **kwargs):
+    async def _write_batch(self, chunk, semaphore):
+        """
+        BEST PRACTICE: Resubmit UnprocessedItems instead of dropping them
+        - Jittered exponential backoff gives throttled partitions time to recover
+        """
+        request_items = {
+            TABLE_NAME: [{'PutRequest': {'Item': item}} for item in chunk]
+        }
+        async with semaphore:
+            for attempt in range(BATCH_MAX_RETRIES + 1):
+                response = await self.dynamodb.batch_write_item(RequestItems=request_items)
+                request_items = response.get('UnprocessedItems')
+                if not request_items:
+                    return
+                if attempt < BATCH_MAX_RETRIES:
+                    await _backoff(attempt)
+        
+        remaining = len(request_items.get(TABLE_NAME, []))
+        raise RuntimeError(
+            f"{remaining} items still unprocessed after {BATCH_MAX_RETRIES} retries"
+        )
+    
+    async def _get_batch(self, keys):
+        """
+        BEST PRACTICE: Re-request UnprocessedKeys instead of returning partial results
+        - Jittered exponential backoff gives throttled partitions time to recover
+        - keys: unique (userId, timestamp) tuples
+        """
+        request_items = {
+            TABLE_NAME: {
+                'Keys': [_low_level_key(user_id, timestamp) for user_id, timestamp in keys],
+                'ProjectionExpression': _PROJ_BATCH_PROFILE,
+                'ExpressionAttributeNames': _TS_NAMES
+            }
+        }
+        raw = []
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = await self.client.batch_get_item(RequestItems=request_items)
+            raw.extend(response['Responses'].get(TABLE_NAME, []))
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                return raw
+            if attempt < BATCH_MAX_RETRIES:
+                await _backoff(attempt)
+        
+        remaining = len(request_items[TABLE_NAME]['Keys'])
+        raise RuntimeError(
+            f"{remaining} keys still unprocessed after {BATCH_MAX_RETRIES} retries"
+        )
+    
+    async def put_user_profile(self, user_id, email, first_name, last_name, **kwargs):
         """
         BEST PRACTICE: Use put_item for full item creation/replacement
         - Includes ConditionExpression to prevent accidental overwrites
         - Accepts additional attributes via kwargs for schema flexibility
         """
-        timestamp = str(int(time.time()))
+        # Integer-only path: no float round-trip through time.time()
+        timestamp = str(time.time_ns() // 1_000_000_000)
         
         item = {
             'userId': user_id,
@@ -63,176 +385,261 @@ class DynamoDBApp:
         
         try:
             # BEST PRACTICE: Use condition to prevent overwriting existing items
-            response = self.table.put_item(
+            response = await self.table.put_item(
                 Item=item,
-                ConditionExpression='attribute_not_exists(userId) AND attribute_not_exists(#ts)',
-                ExpressionAttributeNames={
-                    '#ts': 'timestamp'
-                }
+                ConditionExpression=_PUT_CONDITION,
+                ExpressionAttributeNames=_TS_NAMES
             )
-            print(f"✓ Created profile for {user_id}")
+            self._profile_cache.invalidate((user_id, timestamp))
+            self._email_cache.invalidate(email)
+            log.debug("✓ Created profile for %s", user_id)
             return response
         except ClientError as e:
             if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                print(f"✗ Item already exists for {user_id} at timestamp {timestamp}")
+                log.warning("✗ Item already exists for %s at timestamp %s", user_id, timestamp)
             else:
-                print(f"✗ Error: {e.response['Error']['Message']}")
+                log.error("✗ Error: %s", e.response['Error']['Message'])
             raise
     
-    def get_user_profile(self, user_id, timestamp):
+    async def upsert_user_profile(self, user_id, timestamp, email, first_name, last_name,
+                                  first_write_wins=False):
         """
-        BEST PRACTICE: Use get_item for single-item retrieval by primary key
-        - Most efficient operation (direct key lookup)
-        - Use ProjectionExpression to fetch only needed attributes
+        BEST PRACTICE: Use a conditional update_item instead of a full put_item
+        - if_not_exists keeps attributes that are already set
+        - Only the named attributes go over the wire, not the whole item
+        - first_write_wins=True fails if the item already exists
         """
+        kwargs = {}
+        if first_write_wins:
+            kwargs['ConditionExpression'] = 'attribute_not_exists(userId)'
+        
         try:
-            response = self.table.get_item(
+            response = await self.table.update_item(
                 Key={
                     'userId': user_id,
                     'timestamp': timestamp
                 },
+                UpdateExpression=_UPSERT_EXPR,
+                ExpressionAttributeValues={
+                    ':email': email,
+                    ':first': first_name,
+                    ':last': last_name
+                },
+                **kwargs
+            )
+            self._profile_cache.invalidate((user_id, timestamp))
+            self._email_cache.invalidate(email)
+            log.debug("✓ Upserted profile for %s", user_id)
+            return response
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                log.warning("✗ Item already exists for %s at timestamp %s", user_id, timestamp)
+            else:
+                log.error("✗ Error: %s", e.response['Error']['Message'])
+            raise
+    
+    async def get_user_profile(self, user_id, timestamp):
+        """
+        BEST PRACTICE: Use get_item for single-item retrieval by primary key
+        - Most efficient operation (direct key lookup)
+        - Use ProjectionExpression to fetch only needed attributes
+        - Repeat and concurrent reads of the same key share one request
+        """
+        return await self._profile_cache.get(
+            (user_id, timestamp),
+            lambda: self._fetch_user_profile(user_id, timestamp)
+        )
+    
+    async def _fetch_user_profile(self, user_id, timestamp):
+        """Hot path: low-level client, so only the returned attributes are deserialized"""
+        try:
+            response = await self.client.get_item(
+                TableName=TABLE_NAME,
+                Key=_low_level_key(user_id, timestamp),
                 # BEST PRACTICE: Fetch only required attributes
-                ProjectionExpression='userId, email, firstName, lastName, loginCount'
+                ProjectionExpression=_PROJ_PROFILE
             )
             
             if 'Item' in response:
-                print(f"✓ Retrieved profile for {user_id}")
-                return response['Item']
+                log.debug("✓ Retrieved profile for %s", user_id)
+                return self._deserialize_item(response['Item'])
             else:
-                print(f"✗ No item found for {user_id} at {timestamp}")
+                log.info("✗ No item found for %s at %s", user_id, timestamp)
                 return None
         except ClientError as e:
-            print(f"✗ Error: {e.response['Error']['Message']}")
+            log.error("✗ Error: %s", e.response['Error']['Message'])
             raise
     
-    def query_user_activity(self, user_id, start_time=None, end_time=None):
+    async def _query_all(self, limit=None, **kwargs):
+        """
+        BEST PRACTICE: Follow LastEvaluatedKey; each query page is capped at 1 MB
+        - Without this loop, large result sets are silently truncated
+        - Stops early once `limit` items have been collected
+        """
+        if limit is not None:
+            if limit < 0:
+                raise ValueError(f"limit must be non-negative, got {limit}")
+            if limit == 0:
+                return []
+        
+        items = []
+        while True:
+            if limit is not None:
+                kwargs['Limit'] = limit - len(items)
+            response = await self.table.query(**kwargs)
+            items.extend(response['Items'])
+            
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key or (limit is not None and len(items) >= limit):
+                return items
+            kwargs['ExclusiveStartKey'] = last_key
+    
+    async def query_user_activity(self, user_id, start_time=None, end_time=None, limit=None):
         """
         BEST PRACTICE: Use query (not scan) for efficient data retrieval
         - Queries within a partition using sort key conditions
-        - Returns items in sort key order
+        - Returns items in sort key order, all pages (or the first `limit`)
         """
         try:
-            # Build key condition
-            key_condition = Key('userId').eq(user_id)
-            
             # BEST PRACTICE: Add range conditions on sort key
-            if start_time and end_time:
-                key_condition &= Key('timestamp').between(start_time, end_time)
-            elif start_time:
-                key_condition &= Key('timestamp').gte(start_time)
-            elif end_time:
-                key_condition &= Key('timestamp').lte(end_time)
+            key_condition = _ACTIVITY_KEY_CONDITIONS[(bool(start_time), bool(end_time))]
+            attr_values = {':uid': user_id}
+            if start_time:
+                attr_values[':start'] = start_time
+            if end_time:
+                attr_values[':end'] = end_time
             
-            response = self.table.query(
+            items = await self._query_all(
+                limit=limit,
                 KeyConditionExpression=key_condition,
+                ExpressionAttributeValues=attr_values,
+                # BEST PRACTICE: Fetch only required attributes
+                ProjectionExpression=_PROJ_ACTIVITY,
+                ExpressionAttributeNames=_TS_NAMES,
                 ScanIndexForward=True  # Sort ascending (False for descending)
             )
             
-            items = response['Items']
-            print(f"✓ Found {len(items)} activity records for {user_id}")
+            log.debug("✓ Found %s activity records for %s", len(items), user_id)
             return items
         except ClientError as e:
-            print(f"✗ Error: {e.response['Error']['Message']}")
+            log.error("✗ Error: %s", e.response['Error']['Message'])
             raise
     
-    def update_login_count(self, user_id, timestamp, increment=1):
+    async def update_login_count(self, user_id, timestamp, increment=1, return_full=False):
         """
         BEST PRACTICE: Use update_item for partial updates
         - Atomic operations (ADD for counters)
         - Only sends changed data, not entire item
         - Use UpdateExpression, not replacing whole item
+        - return_full=True returns the whole updated item (ALL_NEW), saving
+          the follow-up get_item round-trip
+        - Hot path: low-level client with hand-marshalled key and increment;
+          the new count is read straight from its N string
         """
         try:
-            response = self.table.update_item(
-                Key={
-                    'userId': user_id,
-                    'timestamp': timestamp
-                },
+            response = await self.client.update_item(
+                TableName=TABLE_NAME,
+                Key=_low_level_key(user_id, timestamp),
                 # BEST PRACTICE: Atomic counter increment
-                UpdateExpression='ADD loginCount :inc',
+                UpdateExpression=_UPDATE_LOGIN_EXPR,
                 ExpressionAttributeValues={
-                    ':inc': increment
+                    ':inc': {'N': str(increment)}
                 },
-                ReturnValues='UPDATED_NEW'  # Return only updated attributes
+                # Return only updated attributes unless the full item is wanted
+                ReturnValues='ALL_NEW' if return_full else 'UPDATED_NEW'
             )
             
-            new_count = response['Attributes'].get('loginCount', 0)
-            print(f"✓ Updated login count to {new_count} for {user_id}")
+            self._profile_cache.invalidate((user_id, timestamp))
+            # BEST PRACTICE: N is a decimal string on the wire; build the
+            # counter from it directly instead of running the deserializer.
+            # Decimal (not int) keeps fractional counts working and matches
+            # what every other read path returns
+            attributes = response['Attributes']
+            new_count = Decimal(attributes['loginCount']['N'])
+            log.debug("✓ Updated login count to %s for %s", new_count, user_id)
+            if return_full:
+                return self._deserialize_item(attributes)
+            response['Attributes'] = {'loginCount': new_count}
             return response
         except ClientError as e:
-            print(f"✗ Error: {e.response['Error']['Message']}")
+            log.error("✗ Error: %s", e.response['Error']['Message'])
             raise
     
-    def update_preferences(self, user_id, timestamp, theme=None, notifications=None):
+    async def update_preferences(self, user_id, timestamp, theme=None, notifications=None):
         """
         BEST PRACTICE: Update nested attributes using dot notation
         - Updates only specified nested fields
         - Preserves other nested attributes
         """
-        update_parts = []
-        attr_values = {}
-        attr_names = {}
+        mask = (theme is not None) | ((notifications is not None) << 1)
+        if not mask:
+            log.warning("✗ No updates specified")
+            return None
         
+        update_expr, attr_names = _PREFERENCE_UPDATES[mask]
+        attr_values = {}
         if theme is not None:
-            update_parts.append('#prefs.#theme = :theme')
             attr_values[':theme'] = theme
-            attr_names['#prefs'] = 'preferences'
-            attr_names['#theme'] = 'theme'
-        
         if notifications is not None:
-            update_parts.append('#prefs.#notif = :notif')
             attr_values[':notif'] = notifications
-            attr_names['#prefs'] = 'preferences'
-            attr_names['#notif'] = 'notifications'
-        
-        if not update_parts:
-            print("✗ No updates specified")
-            return None
         
         try:
-            response = self.table.update_item(
+            response = await self.table.update_item(
                 Key={
                     'userId': user_id,
                     'timestamp': timestamp
                 },
-                UpdateExpression='SET ' + ', '.join(update_parts),
+                UpdateExpression=update_expr,
                 ExpressionAttributeNames=attr_names,
                 ExpressionAttributeValues=attr_values,
                 ReturnValues='ALL_NEW'
             )
-            print(f"✓ Updated preferences for {user_id}")
+            self._profile_cache.invalidate((user_id, timestamp))
+            log.debug("✓ Updated preferences for %s", user_id)
             return response['Attributes']
         except ClientError as e:
-            print(f"✗ Error: {e.response['Error']['Message']}")
+            log.error("✗ Error: %s", e.response['Error']['Message'])
             raise
     
-    def query_by_email(self, email):
+    async def query_by_email(self, email, limit=None):
         """
         BEST PRACTICE: Use GSI for alternate access patterns
         - Query non-key attributes efficiently
         - Avoids expensive table scans
+        - Requests only attributes in GSI_PROJECTION; a GSI query can't
+          fetch anything else from the base table
+        - Full (unlimited) results are cached briefly per email
         """
+        if limit is None:
+            return await self._email_cache.get(email, lambda: self._fetch_by_email(email))
+        return await self._fetch_by_email(email, limit)
+    
+    async def _fetch_by_email(self, email, limit=None):
+        """Query the email GSI, following every page (or stopping at `limit`)"""
         try:
-            response = self.table.query(
+            items = await self._query_all(
+                limit=limit,
                 IndexName=GSI_NAME,
-                KeyConditionExpression=Key('email').eq(email)
+                KeyConditionExpression='email = :email',
+                ExpressionAttributeValues={':email': email},
+                ProjectionExpression=_EMAIL_PROJECTION,
+                ExpressionAttributeNames=_TS_NAMES
             )
             
-            items = response['Items']
-            print(f"✓ Found {len(items)} profiles with email {email}")
+            log.debug("✓ Found %s profiles with email %s", len(items), email)
             return items
         except ClientError as e:
-            print(f"✗ Error: {e.response['Error']['Message']}")
+            log.error("✗ Error: %s", e.response['Error']['Message'])
             raise
     
-    def delete_user_profile(self, user_id, timestamp):
+    async def delete_user_profile(self, user_id, timestamp):
         """
         BEST PRACTICE: Use delete_item with conditions
         - Add ConditionExpression for safety
         - Returns deleted item if needed
         """
         try:
-            response = self.table.delete_item(
+            response = await self.table.delete_item(
                 Key={
                     'userId': user_id,
                     'timestamp': timestamp
@@ -242,99 +649,157 @@ class DynamoDBApp:
                 ReturnValues='ALL_OLD'  # Return deleted item
             )
             
+            self._profile_cache.invalidate((user_id, timestamp))
             if 'Attributes' in response:
-                print(f"✓ Deleted profile for {user_id} at {timestamp}")
+                self._email_cache.invalidate(response['Attributes'].get('email'))
+                log.debug("✓ Deleted profile for %s at %s", user_id, timestamp)
                 return response['Attributes']
             else:
-                print(f"✗ No item found to delete")
+                log.info("✗ No item found to delete")
                 return None
         except ClientError as e:
             if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
-                print(f"✗ Item does not exist")
+                log.warning("✗ Item does not exist")
             else:
-                print(f"✗ Error: {e.response['Error']['Message']}")
+                log.error("✗ Error: %s", e.response['Error']['Message'])
             raise
     
-    def batch_get_profiles(self, user_items):
+    async def batch_get_profiles(self, user_items, batch_size=100):
         """
         BEST PRACTICE: Use batch_get_item for multiple items
-        - Retrieves up to 100 items in single request
+        - Retrieves up to 100 items per request; larger inputs are split
+          into batch_size chunks that are fetched concurrently
         - More efficient than multiple get_item calls
+        - Low-level client call; keys and results are (de)serialized here
         - Input: list of {'userId': ..., 'timestamp': ...} dicts
+        - Output follows input order, with None for keys that weren't found;
+          repeated input keys each get their own copy of the item
         """
+        if not 1 <= batch_size <= 100:
+            raise ValueError(f"batch_size must be between 1 and 100, got {batch_size}")
+        
         try:
-            response = self.dynamodb.batch_get_item(
-                RequestItems={
-                    TABLE_NAME: {
-                        'Keys': user_items
-                    }
-                }
-            )
+            # BEST PRACTICE: De-duplicate keys first; BatchGetItem rejects a
+            # request that lists the same key twice
+            unique_keys = list(dict.fromkeys(
+                (key['userId'], key['timestamp']) for key in user_items
+            ))
+            chunks = [
+                unique_keys[i:i + batch_size]
+                for i in range(0, len(unique_keys), batch_size)
+            ]
+            results = await asyncio.gather(*[self._get_batch(chunk) for chunk in chunks])
             
-            items = response['Responses'].get(TABLE_NAME, [])
-            print(f"✓ Retrieved {len(items)} profiles in batch")
-            return items
+            # BEST PRACTICE: BatchGetItem doesn't preserve key order, so match
+            # results back to the input through a dict instead of sorting
+            by_key = {}
+            for raw in results:
+                for raw_item in raw:
+                    item = self._deserialize_item(raw_item)
+                    by_key[(item['userId'], item['timestamp'])] = item
+            
+            log.debug("✓ Retrieved %s profiles in batch", len(by_key))
+            ordered = []
+            seen = set()
+            for key in user_items:
+                key = (key['userId'], key['timestamp'])
+                item = by_key.get(key)
+                # Later duplicates get a copy so entries don't share one dict
+                ordered.append(copy.deepcopy(item) if key in seen else item)
+                seen.add(key)
+            return ordered
         except ClientError as e:
-            print(f"✗ Error: {e.response['Error']['Message']}")
+            log.error("✗ Error: %s", e.response['Error']['Message'])
             raise
 
 
-def demo():
-    """Demonstrate DynamoDB best practices"""
-    app = DynamoDBApp()
+def load_seed_data_sync(filename='seed_data.json'):
+    """
+    Synchronous fallback for callers that aren't async
+    - Runs on a worker thread if this thread already has a running event loop
+    """
+    async def _load():
+        async with DynamoDBApp() as app:
+            return await app.load_seed_data(filename)
     
-    print("\n=== 0. LOAD SEED DATA ===")
-    app.load_seed_data()    
-
-    print("\n=== 1. PUT ITEM (with condition) ===")
     try:
-        app.put_user_profile(
-            user_id='user789',
-            email='user789@example.com',
-            first_name='Alice',
-            last_name='Johnson',
-            preferences={'theme': 'dark', 'notifications': True},
-            loginCount=0
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_load())
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _load()).result()
+
+
+async def demo():
+    """Demonstrate DynamoDB best practices"""
+    # INFO for this module only; botocore's INFO output is just noise here
+    logging.basicConfig(format='%(message)s')
+    log.setLevel(logging.INFO)
+    async with DynamoDBApp() as app:
+        print("\n=== 0. LOAD SEED DATA ===")
+        await app.load_seed_data()
+
+        print("\n=== 1. PUT ITEM (with condition) ===")
+        try:
+            await app.put_user_profile(
+                user_id='user789',
+                email='user789@example.com',
+                first_name='Alice',
+                last_name='Johnson',
+                preferences={'theme': 'dark', 'notifications': True},
+                loginCount=0
+            )
+        except ClientError:
+            pass
+
+        # BEST PRACTICE: Independent reads overlap their round-trips
+        # - The updates in steps 4 and 5 run afterwards, so every read
+        #   sees the item as it was before them
+        profile, activities, profiles, batch_items = await asyncio.gather(
+            app.get_user_profile('user123', '1698768000'),
+            app.query_user_activity('user123', start_time='1698700000'),
+            app.query_by_email('user456@example.com'),
+            app.batch_get_profiles([
+                {'userId': 'user123', 'timestamp': '1698768000'},
+                {'userId': 'user456', 'timestamp': '1698940800'}
+            ])
         )
-    except ClientError:
-        pass
-    
-    print("\n=== 2. GET ITEM (with projection) ===")
-    profile = app.get_user_profile('user123', '1698768000')
-    if profile:
-        print(f"Profile: {profile}")
-    
-    print("\n=== 3. QUERY (partition + sort key range) ===")
-    activities = app.query_user_activity('user123', start_time='1698700000')
-    for activity in activities:
-        print(f"  - Timestamp: {activity['timestamp']}, Logins: {activity.get('loginCount', 0)}")
-    
-    print("\n=== 4. UPDATE ITEM (atomic counter) ===")
-    app.update_login_count('user123', '1698768000', increment=1)
-    
-    print("\n=== 5. UPDATE NESTED ATTRIBUTES ===")
-    updated = app.update_preferences('user123', '1698768000', theme='blue')
-    if updated:
-        print(f"New preferences: {updated.get('preferences')}")
-    
-    print("\n=== 6. QUERY GSI (by email) ===")
-    profiles = app.query_by_email('user456@example.com')
-    for profile in profiles:
-        print(f"  - User: {profile['userId']}, Name: {profile.get('firstName')}")
-    
-    print("\n=== 7. BATCH GET ===")
-    batch_items = app.batch_get_profiles([
-        {'userId': 'user123', 'timestamp': '1698768000'},
-        {'userId': 'user456', 'timestamp': '1698940800'}
-    ])
-    print(f"Retrieved {len(batch_items)} items")
-    
-    print("\n=== 8. DELETE ITEM (with condition) ===")
-    try:
-        app.delete_user_profile('user789', str(int(time.time())))
-    except ClientError:
-        pass
+
+        print("\n=== 2. GET ITEM (with projection) ===")
+        if profile:
+            print(f"Profile: {profile}")
+
+        print("\n=== 3. QUERY (partition + sort key range) ===")
+        for activity in activities:
+            print(f"  - Timestamp: {activity['timestamp']}, Logins: {activity.get('loginCount', 0)}")
+
+        print("\n=== 4. UPDATE ITEM (atomic counter) ===")
+        # BEST PRACTICE: Read the updated item back in the same round-trip
+        updated = await app.update_login_count(
+            'user123', '1698768000', increment=1, return_full=True
+        )
+        print(f"Updated profile: {updated}")
+
+        print("\n=== 5. UPDATE NESTED ATTRIBUTES ===")
+        updated = await app.update_preferences('user123', '1698768000', theme='blue')
+        if updated:
+            print(f"New preferences: {updated.get('preferences')}")
+
+        print("\n=== 6. QUERY GSI (by email) ===")
+        for profile in profiles:
+            print(f"  - User: {profile['userId']}, Name: {profile.get('firstName')}")
+
+        print("\n=== 7. BATCH GET ===")
+        found = [item for item in batch_items if item is not None]
+        print(f"Retrieved {len(found)} of {len(batch_items)} items")
+
+        print("\n=== 8. DELETE ITEM (with condition) ===")
+        try:
+            await app.delete_user_profile('user789', str(time.time_ns() // 1_000_000_000))
+        except ClientError:
+            pass
 
 
 if __name__ == '__main__':
-    demo()
+    asyncio.run(demo())
@@ -0,0 +1,137 @@
+"""Behaviour tests for the read cache behind get_user_profile / query_by_email"""
+
+import asyncio
+import gc
+
+import pytest
+
+from dynamo_app import _CoalescingCache
+
+
+class Fetcher:
+    """Counts calls and holds each one until released"""
+
+    def __init__(self, value=None, error=None):
+        self.calls = 0
+        self.value = value
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return self.value
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def run():
+        cache = _CoalescingCache(maxsize=10, ttl=30)
+        fetch = Fetcher(value={'userId': 'user123'})
+
+        waiters = [asyncio.ensure_future(cache.get('k', fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert fetch.calls == 1
+        assert all(r == {'userId': 'user123'} for r in results)
+        # Every caller gets its own copy
+        assert results[0] is not results[1]
+
+    asyncio.run(run())
+
+
+def test_hits_are_served_from_cache_as_copies():
+    async def run():
+        cache = _CoalescingCache(maxsize=10, ttl=30)
+        fetch = Fetcher(value={'loginCount': 42})
+        fetch.release.set()
+
+        first = await cache.get('k', fetch)
+        first['loginCount'] = 0
+        second = await cache.get('k', fetch)
+
+        assert fetch.calls == 1
+        assert second == {'loginCount': 42}
+
+    asyncio.run(run())
+
+
+def test_none_is_not_cached():
+    async def run():
+        cache = _CoalescingCache(maxsize=10, ttl=30)
+        fetch = Fetcher(value=None)
+        fetch.release.set()
+
+        assert await cache.get('k', fetch) is None
+        assert await cache.get('k', fetch) is None
+        assert fetch.calls == 2
+
+    asyncio.run(run())
+
+
+def test_invalidate_during_fetch_skips_caching_the_stale_result():
+    async def run():
+        cache = _CoalescingCache(maxsize=10, ttl=30)
+        stale = Fetcher(value={'loginCount': 42})
+
+        waiter = asyncio.ensure_future(cache.get('k', stale))
+        await asyncio.sleep(0)
+        cache.invalidate('k')
+        stale.release.set()
+        assert await waiter == {'loginCount': 42}
+
+        fresh = Fetcher(value={'loginCount': 43})
+        fresh.release.set()
+        assert await cache.get('k', fresh) == {'loginCount': 43}
+        assert fresh.calls == 1
+
+    asyncio.run(run())
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def run():
+        cache = _CoalescingCache(maxsize=10, ttl=30)
+        failing = Fetcher(error=RuntimeError('boom'))
+
+        waiters = [asyncio.ensure_future(cache.get('k', failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        failing.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert failing.calls == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        retry = Fetcher(value={'userId': 'user123'})
+        retry.release.set()
+        assert await cache.get('k', retry) == {'userId': 'user123'}
+
+    asyncio.run(run())
+
+
+def test_failed_fetch_after_caller_cancelled_is_not_reported_unretrieved():
+    unhandled = []
+
+    async def run():
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: unhandled.append(context)
+        )
+        cache = _CoalescingCache(maxsize=10, ttl=30)
+        failing = Fetcher(error=RuntimeError('boom'))
+
+        waiter = asyncio.ensure_future(cache.get('k', failing))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        failing.release.set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        gc.collect()
+
+    asyncio.run(run())
+    gc.collect()
+    assert unhandled == []